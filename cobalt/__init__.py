@@ -5,7 +5,6 @@
 # SPDX-License-Identifier: BSD-3-Clause
 ##############################################################################
 
-import subprocess
 from cobalt.cobalt import Cobalt, UserPolicy
 
 __all__ = [ 'Cobalt', 'UserPolicy' ]
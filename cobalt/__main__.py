@@ -7,28 +7,52 @@
 # SPDX-License-Identifier: BSD-3-Clause
 ##############################################################################
 
-from getpass import getuser
-from datetime import timedelta
 import argparse
-import re
+import sys
 from cobalt import Cobalt, UserPolicy
 
-# Local user
-user = getuser()
+def write_lines(lines):
+    """
+    Write lines to stdout in chunks of bytes instead of joining them all in
+    a single string. Lines are written one by one to a stdout without binary
+    buffer.
+    """
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        for line in lines:
+            sys.stdout.write(line + '\n')
+        return
+    encoding = sys.stdout.encoding or 'utf-8'
+    errors = sys.stdout.errors or 'strict'
+    sys.stdout.flush()
+    chunk = bytearray()
+    for line in lines:
+        chunk += line.encode(encoding, errors)
+        chunk += b'\n'
+        if len(chunk) >= 1 << 16:
+            out.write(chunk)
+            del chunk[:]
+    out.write(chunk)
+    out.flush()
 
-"""
-Predefined submition policy that will let most nodes available
-during office hours and still half of the nodes outside office hours.
+def queue_name(job):
+    """
+    Name of job queue whether or not it was connected to a Cobalt.Queue.
+    """
+    return getattr(job.queue, 'name', job.queue)
 
-"""
-nice_user = UserPolicy(office_day_start=timedelta(hours=7),
-                       office_day_stop=timedelta(hours=21),
-                       office_max_occupancy=0.25,
-                       max_occupancy=0.5,
-                       office_maxtime=timedelta(minutes=30),
-                       maxtime=timedelta(hours=2))
-
-queues, jobs = Cobalt.get_queues_jobs()
+def positive_int(value):
+    """
+    argparse type of integers greater than 0.
+    """
+    try:
+        n = int(value)
+    except ValueError:
+        n = 0
+    if n < 1:
+        raise argparse.ArgumentTypeError(
+            'expected an integer >= 1, got {!r}'.format(value))
+    return n
 
 parser = argparse.ArgumentParser()    
 parser.add_argument("action",
@@ -47,52 +71,95 @@ parser.add_argument('-q', '--queue', help="Restrict the list of jobs/queues to q
 parser.add_argument('-l', '--location', help="Restrict the list of jobs/queues to a specific location.")
 parser.add_argument('-u', '--user', help="Filter jobs to only show this user jobs.")
 parser.add_argument('-j', '--jobname', help="Restrict the list of jobs to jobs containing this string.")
+parser.add_argument('-p', '--parallel', type=positive_int, help="Run del/hold/rls as one command per job, this many at a time, instead of a single batched command.")
 parser.add_argument('--restrict', help="Restrict the list of queues according to nice_user policy.", action='store_true')
 args = parser.parse_args()
 
+# Query cobalt only once arguments are valid.
+queues, jobs = Cobalt.get_queues_jobs()
+
 # Fitering
+# Each flag contributes a predicate and jobs/queues are walked only once.
+queue_preds = []
+job_preds = []
 if args.restrict:
-    queues = nice_user.get_queues()
-    jobs = [ j for j in jobs if j.queue in queues ]
+    from datetime import timedelta
+    # Predefined submition policy that will let most nodes available
+    # during office hours and still half of the nodes outside office hours.
+    nice_user = UserPolicy(office_day_start=timedelta(hours=7),
+                           office_day_stop=timedelta(hours=21),
+                           office_max_occupancy=0.25,
+                           max_occupancy=0.5,
+                           office_maxtime=timedelta(minutes=30),
+                           maxtime=timedelta(hours=2))
+    queues = nice_user.get_queues(queues)
+    restricted = set(q.name for q in queues)
+    job_preds.append(lambda j: queue_name(j) in restricted)
 if args.queue:
-    queues = [ q for q in queues if args.queue in q.name ]
-    jobs = [ j for j in jobs if args.queue in j.queue.name ]
+    matching = set(q.name for q in queues if args.queue in q.name)
+    queue_preds.append(lambda q: q.name in matching)
+    job_preds.append(lambda j: queue_name(j) in matching)
 if args.location:
-    queues = [ q for q in queues if q.name in args.location ]
-    jobs = [ j for j in jobs if hasattr(j, 'location') and args.location in j.location ]
+    queue_preds.append(lambda q: q.name in args.location)
+    job_preds.append(lambda j: j.location is not None and args.location in j.location)
 if not args.all and not args.user:
-    jobs = [ j for j in jobs if j.user == user ]
+    from cobalt.cobalt import user
+    job_preds.append(lambda j: j.user == user)
 if args.jobname:
-    jobs = [ j for j in jobs if args.jobname in j.name ]
+    job_preds.append(lambda j: args.jobname in j.name)
 if args.user:
-    jobs = [ j for j in jobs if args.user in j.user ]
+    job_preds.append(lambda j: args.user in j.user)
+
+# qlist only outputs queues and other actions only work on jobs.
+if args.action == 'qlist':
+    if queue_preds and queues:
+        queues = [ q for q in queues if all(p(q) for p in queue_preds) ]
+elif job_preds and jobs:
+    jobs = [ j for j in jobs if all(p(j) for p in job_preds) ]
 
 # Action
-if args.action == 'del':
-    for j in jobs:
-        j.cancel()
-if args.action == 'hold':
-    for j in jobs:
-        j.hold()
-if args.action == 'rls':
-    for j in jobs:
-        j.release()
+if args.action in ('del', 'hold', 'rls') and args.parallel:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    action = { 'del': Cobalt.Job.cancel,
+               'hold': Cobalt.Job.hold,
+               'rls': Cobalt.Job.release }[args.action]
+    # Workers only run commands. Their output is printed from this thread
+    # so that outputs of different jobs do not interleave.
+    errors = 0
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        futures = [ executor.submit(action, j) for j in jobs ]
+        for f in as_completed(futures):
+            if f.exception() is not None:
+                print(f.exception(), file=sys.stderr)
+                errors += 1
+            else:
+                print(f.result())
+    if errors > 0:
+        sys.exit(1)
+elif args.action in ('del', 'hold', 'rls'):
+    action = { 'del': Cobalt.cancel_many,
+               'hold': Cobalt.hold_many,
+               'rls': Cobalt.release_many }[args.action]
+    output = action(jobs)
+    if output is not None:
+        print(output)
 if args.action == 'jlist':
     if not args.verbose:
-        print('\n'.join([ str(j.jobid) for j in jobs ]))
+        write_lines(str(j.jobid) for j in jobs)
     else:
         for j in jobs:
             print(j)
 if args.action == 'qlist':
     if not args.verbose:
-        print('\n'.join([ str(q.name) for q in queues ]))
+        write_lines(q.name for q in queues)
     else:
         for q in queues:
             print(q)
 if args.action == 'jstat':
     if not args.verbose:
-        print('\n').join([ str(j.remaining_time) for j in jobs ])
+        write_lines(str(j.remaining_time) for j in jobs)
     else:
+        node_re = Cobalt.Job._loc_idx_re
         for j in jobs:
             if len(j.users) > 1:
                 user = str(j.users)
@@ -100,11 +167,13 @@ if args.action == 'jstat':
                 user = j.user
             location = repr(j.queue)                
             if j.location is not None and len(j.location) > 1:                
-                location += '[{}]'.format(','.join([re.match('[a-zA-Z]+(?P<i>\d+)', l).group(1) for l in j.location]))
-            print('{} {}'.format(user, location))
-            print('\tqueued_time: {}'.format(j.queued_time))
-            print('\tstart_time: {}'.format(j.start_time))
-            print('\truntime: {}'.format(j.runtime))
-            print('\twalltime: {}'.format(j.walltime))
-            print('\tremaining_time: {}'.format(j.remaining_time))
+                location += '[{}]'.format(','.join(node_re.match(l).group(1) for l in j.location))
+            sys.stdout.write('{} {}\n'
+                             '\tqueued_time: {}\n'
+                             '\tstart_time: {}\n'
+                             '\truntime: {}\n'
+                             '\twalltime: {}\n'
+                             '\tremaining_time: {}\n'.format(
+                                 user, location, j.queued_time, j.start_time,
+                                 j.runtime, j.walltime, j.remaining_time))
     
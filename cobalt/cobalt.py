@@ -7,23 +7,138 @@
 
 import os
 import re
+import sys
 import stat
+import time
+import pickle
+from ast import literal_eval
+from copy import copy
 from getpass import getuser
-from subprocess import check_output
-from math import ceil
-from tempfile import mkstemp
+from subprocess import run, Popen, PIPE, CalledProcessError
+from tempfile import mkstemp, gettempdir
 from datetime import timedelta, datetime
 
-user = getuser()
+# Current user, resolved once per process: getuser() may end up in a
+# password database lookup. Interned like parsed job users, see _parse_name().
+user = sys.intern(getuser())
 
-def getoutput(cmd):
-    return check_output(cmd.split(), universal_newlines=True)
+def getoutput(argv):
+    """
+    Run argv and return its output decoded at once.
+    Raises CalledProcessError if the command fails.
+    """
+    return run(argv, stdout=PIPE, check=True).stdout.decode('utf-8', 'replace')
+
+def getrecords(argv):
+    """
+    Start argv and return a generator of the blank line separated records of
+    its output, yielded while it is running.
+    argv is started right away, before the first record is requested.
+    """
+    proc = Popen(argv, stdout=PIPE, universal_newlines=True,
+                 bufsize=1 << 16)
+    records = _iter_records(proc, argv)
+    # Enter the generator such that closing it before reading any record
+    # still kills and waits argv.
+    next(records)
+    return records
+
+def _iter_records(proc, argv):
+    try:
+        yield
+        record = []
+        for line in proc.stdout:
+            if line == '\n':
+                yield ''.join(record)
+                record = []
+            else:
+                record.append(line)
+        if len(record) > 0:
+            yield ''.join(record)
+    except GeneratorExit:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if proc.returncode != 0:
+        raise CalledProcessError(proc.returncode, argv)
+
+def _qstat(args):
+    """
+    Yield the records printed by qstat args. qstat is executed directly,
+    without a shell.
+    """
+    return getrecords(['qstat'] + args)
+
+# A comma separated item of a job location: a hostname or a hostname
+# prefix followed by a [start-end] range.
+location_re = re.compile(r'([^,\[]+)(?:\[(\d+)-(\d+)\])?')
+
+# Parsers of `qstat -f -l` field values.
+# They return None or raise ValueError when the value is empty or malformed.
+
+def _parse_str(value):
+    return value if value else None
+
+def _parse_name(value):
+    # Interned such that comparisons between names are identity checks.
+    return sys.intern(value) if value else None
+
+def _parse_int(value):
+    return int(value) if value.isdigit() else None
+
+def _parse_list(value):
+    return value.split(':') if value else None
+
+def _parse_hms(value):
+    hours, minutes, seconds = value.split(':', 2)
+    return timedelta(0, int(seconds) + 60 * int(minutes) + 3600 * int(hours))
+
+def _parse_bool(value):
+    if value not in ('True', 'False'):
+        return None
+    return value == 'True'
+
+def _parse_location(value):
+    location = []
+    for match in location_re.finditer(value):
+        name, start, end = match.groups()
+        if start is None:
+            location.append(name)
+        else:
+            location += [ '{}{}'.format(name, i) for i in range(int(start), int(end)+1) ]
+    return location if len(location) > 0 else None
+
+def _parse_envs(value):
+    envs = dict(kv.split('=', 1) for kv in value.split(':') if '=' in kv)
+    return envs if len(envs) > 0 else None
+
+def _parse_attrs(value):
+    try:
+        attrs = literal_eval(value)
+    except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError):
+        return None
+    return attrs if isinstance(attrs, dict) else None
+
+def _parse_dependencies(value):
+    dependencies = [ int(i) for i in value.split(':') if i.isdigit() ]
+    return dependencies if len(dependencies) > 0 else None
 
 class Cobalt:
     """
     User abstraction of cobalt scheduler.
     Contains a Queue abstraction (see Cobalt.Queue) and job Abstraction (see Cobalt.Job).
     """
+
+    # Number of seconds during which get_queues_jobs() result is reused
+    # from cache_file instead of querying cobalt again. 0 disables the cache.
+    cache_ttl = 2
+    cache_file = os.path.join(gettempdir(),
+                              'cobalt-cache-{}.pkl'.format(os.getuid()))
+    # In process copy of the cache: (time.monotonic(), pickled (queues, jobs)).
+    # Kept pickled so that each hit returns fresh Queue and Job objects.
+    _cache = None
     
     class Job:
         """
@@ -46,50 +161,59 @@ class Cobalt:
         envs (dict): Set of environment variables set for the job.
         attrs (dict): Job attributes (usually set to configure a queue)
         dependencies (list(int)): List of jobids on which this job depends.
-        kwargs: Additional keyword arguments depending on how the Job is instanciated.
-        """
-
-        jobid_re = re.compile('.*JobID\s*:\s*(?P<jobid>\d+).*', re.DOTALL)
-        user_re = re.compile('.*User\s*:\s*(?P<jobid>\w+).*', re.DOTALL)
-        users_re = re.compile('.*user_list\s*:\s*(?P<users>\w+(:\w+)*).*',
-                              re.DOTALL)
-        name_re = re.compile(
-            '.*JobName\s*:\s*(?P<name>[a-zA-Z0-9<>\'\"\+\=\-_/\\\|\%\$\#\@\.\:,\t \r\!\?\(\)\[\]\{\}]*)\n.*',
-            re.DOTALL)
-        walltime_re = re.compile(
-            '.*WallTime\s*:\s*(?P<walltime>\d+:\d+:\d+).*', re.DOTALL)
-        runtime_re = re.compile('.*RunTime\s*:\s*(?P<runtime>\d+:\d+:\d+).*',
-                                re.DOTALL)
-        starttime_re = re.compile(
-            '.*StartTime\s*:\s*(?P<starttime>\d+:\d+:\d+).*', re.DOTALL)
-        queuedtime_re = re.compile(
-            '.*QueuedTime\s*:\s*(?P<queuedtime>\d+:\d+:\d+).*', re.DOTALL)
-        remainingtime_re = re.compile(
-            '.*TimeRemaining\s*:\s*(?P<remainingtime>\d+:\d+:\d+).*',
-            re.DOTALL)
-        nodecount_re = re.compile('.*Nodes\s*:\s*(?P<nodes>\d+).*', re.DOTALL)
-        proccount_re = re.compile('.*Procs\s*:\s*(?P<procs>\d+).*', re.DOTALL)
-        location_re = re.compile(
-            '.*Location\s*:\s*(?P<location>(([a-zA-Z0-9-_.]+)(\[\d+-\d+\])?,?)+).*', re.DOTALL)
-        queue_re = re.compile('.*Queue\s*:\s*(?P<queue>[a-zA-Z0-9-_.]+).*',
-                              re.DOTALL)
-        state_re = re.compile('.*State\s*:\s*(?P<state>\w+).*', re.DOTALL)
-        userhold_re = re.compile(
-            '.*UserHold\s*:\s*(?P<userhold>(True|False)).*', re.DOTALL)
-        attrs_re = re.compile(
-            '.*attrs\s*:\s*(?P<attrs>{[a-zA-Z0-9-_.:,\'\"]*}).*', re.DOTALL)
-        envs_re = re.compile(
-            '.*Envs\s*:\s*(?P<env>[a-zA-Z0-9-_.]+=[a-zA-Z0-9-_.]+(:[a-zA-Z0-9-_.]+=[a-zA-Z0-9-_.]+)*).*',
-            re.DOTALL)
-        dependencies_re = re.compile(
-            '.*Dependencies\s*:\s*(?P<dep>\d+(:\d+)*).*', re.DOTALL)
+        project, submit_time, notify: Set when the Job is returned by Queue.submit().
+        """
+
+        __slots__ = ('jobid', 'queue', 'user', 'name', 'users', 'walltime',
+                     'runtime', 'start_time', 'queued_time', 'remaining_time',
+                     'nodecount', 'proccount', 'location', 'state',
+                     'user_hold', 'envs', 'attrs', 'dependencies', 'project',
+                     'submit_time', 'notify', '_raw')
+
+        # qstat field: (Job attribute, value parser)
+        fields = {
+            'JobID': ('jobid', int),
+            'Queue': ('queue', _parse_name),
+            'User': ('user', _parse_name),
+            'JobName': ('name', _parse_str),
+            'user_list': ('users', _parse_list),
+            'WallTime': ('walltime', _parse_hms),
+            'RunTime': ('runtime', _parse_hms),
+            'StartTime': ('start_time', _parse_hms),
+            'QueuedTime': ('queued_time', _parse_hms),
+            'TimeRemaining': ('remaining_time', _parse_hms),
+            'Nodes': ('nodecount', _parse_int),
+            'Procs': ('proccount', _parse_int),
+            'Location': ('location', _parse_location),
+            'State': ('state', _parse_name),
+            'UserHold': ('user_hold', _parse_bool),
+            'Envs': ('envs', _parse_envs),
+            'attrs': ('attrs', _parse_attrs),
+            'Dependencies': ('dependencies', _parse_dependencies),
+        }
+        # Job attribute: value parser
+        parsers = dict(fields.values())
+        # Attribute values of jobs built with from_string() when the
+        # field is missing or malformed. Others default to None.
+        defaults = {
+            'user': 'unknown',
+            'name': '',
+            'users': [],
+            'location': [],
+            'state': 'unknown',
+            'envs': {},
+            'attrs': {},
+            'dependencies': [],
+        }
+        # Index of a node in job location.
+        _loc_idx_re = re.compile(r'[a-zA-Z]+(\d+)')
 
         def __init__(self,
                      jobid,
                      queue,
                      user = "unknown",
                      name='',
-                     users=[],
+                     users=None,
                      walltime=None,
                      runtime=None,
                      start_time=None,
@@ -97,19 +221,19 @@ class Cobalt:
                      remaining_time=None,
                      nodecount=None,
                      proccount=None,
-                     location=[],
+                     location=None,
                      state="unknown",
                      user_hold=None,
-                     envs={},
-                     attrs={},
-                     dependencies=[],
+                     envs=None,
+                     attrs=None,
+                     dependencies=None,
                      **kwargs):
 
             self.jobid = jobid
             self.queue = queue
             self.user = user
             self.name = name
-            self.users = users
+            self.users = users if users is not None else []
             self.walltime = walltime
             self.runtime = runtime
             self.start_time = start_time
@@ -117,11 +241,12 @@ class Cobalt:
             self.remaining_time = remaining_time
             self.nodecount = nodecount
             self.proccount = proccount
-            self.location = location
+            self.location = location if location is not None else []
             self.state = state
             self.user_hold = user_hold
-            self.envs = envs
-            self.attrs = attrs
+            self.envs = envs if envs is not None else {}
+            self.attrs = attrs if attrs is not None else {}
+            self.dependencies = dependencies if dependencies is not None else []
             for k, v in kwargs.items():
                 setattr(self, k, v)
 
@@ -137,7 +262,7 @@ class Cobalt:
                 time = 'unknown'
             location = repr(self.queue)
             if self.location is not None and len(self.location) > 1:
-                location += '[{}]'.format(','.join([re.match('[a-zA-Z]+(?P<i>\d+)', l).group(1) for l in self.location]))
+                location += '[{}]'.format(','.join([Cobalt.Job._loc_idx_re.match(l).group(1) for l in self.location]))
             return '{:8d} {:20s} {:24s} {:16s} {:8s} {:10s}'.format(
                 self.jobid, self.name, location, self.user, self.state,
                 time)
@@ -150,159 +275,102 @@ class Cobalt:
             if isinstance(other, int):
                 return self.jobid == other
 
+        def __getstate__(self):
+            """
+            Pickle only the slots already set, such that pickling does not
+            parse the fields that were not read yet.
+            """
+
+            state = {}
+            for name in Cobalt.Job.__slots__:
+                try:
+                    state[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+            return (None, state)
+
+        def __getattr__(self, name):
+            """
+            Parse a field of a job built with from_string() on first access.
+            Only called when attribute name is not set yet.
+            """
+
+            parse = Cobalt.Job.parsers.get(name)
+            if parse is None or name == '_raw':
+                raise AttributeError(name)
+            value = self._raw.get(name)
+            if value is not None:
+                try:
+                    value = parse(value)
+                except ValueError:
+                    value = None
+            if value is None:
+                value = copy(Cobalt.Job.defaults.get(name))
+            setattr(self, name, value)
+            return value
+
         @staticmethod
         def from_string(s):
-            jobid = int(Cobalt.Job.jobid_re.match(s).group(1))
-            queue = Cobalt.Job.queue_re.match(s).group(1)
-            user = None
-            name = None
-            users = []
-            walltime = None
-            runtime = None
-            start_time = None
-            queued_time = None
-            remaining_time = None
-            nodecount = None
-            proccount = None
-            location = []
-            state = "unknown"
-            user_hold = None
-            envs = {}
-            attrs = {}
-            dependencies = []
-
-            user = Cobalt.Job.user_re.match(s)
-            if user is not None:
-                user = user.group(1)
-            name = Cobalt.Job.name_re.match(s)
-            if name is not None:
-                name = name.group(1)
-            users = Cobalt.Job.users_re.match(s)
-            if users is not None:
-                users = users.group(1).split(':')
-            walltime = Cobalt.Job.walltime_re.match(s)
-            if walltime is not None:
-                hours, minutes, seconds = [
-                    int(i) for i in walltime.group(1).split(':')
-                ]
-                walltime = timedelta(hours=hours,
-                                     minutes=minutes,
-                                     seconds=seconds)
-            runtime = Cobalt.Job.runtime_re.match(s)
-            if runtime is not None:
-                hours, minutes, seconds = [
-                    int(i) for i in runtime.group(1).split(':')
-                ]
-                runtime = timedelta(hours=hours,
-                                    minutes=minutes,
-                                    seconds=seconds)
-            starttime = Cobalt.Job.starttime_re.match(s)
-            if starttime is not None:
-                hours, minutes, seconds = [
-                    int(i) for i in starttime.group(1).split(':')
-                ]
-                start_time = timedelta(hours=hours,
-                                       minutes=minutes,
-                                       seconds=seconds)
-            queuedtime = Cobalt.Job.queuedtime_re.match(s)
-            if queuedtime is not None:
-                hours, minutes, seconds = [
-                    int(i) for i in queuedtime.group(1).split(':')
-                ]
-                queued_time = timedelta(hours=hours,
-                                        minutes=minutes,
-                                        seconds=seconds)
-            remainingtime = Cobalt.Job.remainingtime_re.match(s)
-            if remainingtime is not None:
-                hours, minutes, seconds = [
-                    int(i) for i in remainingtime.group(1).split(':')
-                ]
-                remaining_time = timedelta(hours=hours,
-                                           minutes=minutes,
-                                           seconds=seconds)
-            nodecount = Cobalt.Job.nodecount_re.match(s)
-            if nodecount is not None:
-                nodecount = int(nodecount.group(1))
-            proccount = Cobalt.Job.proccount_re.match(s)
-            if proccount is not None:
-                proccount = int(proccount.group(1))
-
-            locations = Cobalt.Job.location_re.match(s)
-            if locations is not None:
-                locations = locations.group(1).split(',')
-                regex = re.compile('(?P<name>[a-zA-Z_\-.]+)(?P<n>\d+)?(\[(?P<s>\d+)-(?P<e>\d+)\])?')
-                for l in locations:
-                    match = regex.match(l).groupdict()
-                    if match['n'] is not None or match['e'] is None or match['s'] is None:
-                        location.append(l)
-                    else:
-                        location += [ '{}{}'.format(match['name'], i) for i in range(int(match['s']), int(match['e'])+1) ]
-                        
-            state = Cobalt.Job.state_re.match(s)
-            if state is not None:
-                state = state.group(1)
-            user_hold = Cobalt.Job.userhold_re.match(s)
-            if user_hold is not None:
-                user_hold = False if user_hold.group(1) == 'False' else True
-            envs = Cobalt.Job.envs_re.match(s)
-            if envs is not None:
-                envs = {
-                    kv.split('=')[0]: kv.split('=')[1]
-                    for kv in envs.group(1).split(':')
-                }
-            attrs = Cobalt.Job.attrs_re.match(s)
-            if attrs is not None:
-                attrs = eval(attrs.group(1))
-            dependencies = Cobalt.Job.dependencies_re.match(s)
-            if dependencies is not None:
-                dependencies = [
-                    int(i) for i in dependencies.group(1).split(':') if i != ''
-                ]
-
-            return Cobalt.Job(jobid,
-                              queue,
-                              user=user,
-                              name=name,
-                              users=users,
-                              walltime=walltime,
-                              runtime=runtime,
-                              start_time=start_time,
-                              queued_time=queued_time,
-                              remaining_time=remaining_time,
-                              nodecount=nodecount,
-                              proccount=proccount,
-                              location=location,
-                              state=state,
-                              user_hold=user_hold,
-                              envs=envs,
-                              attrs=attrs,
-                              dependencies=dependencies)
+            """
+            Build a job from a `qstat -f -l` record.
+            Record lines are `field : value` pairs split without regex.
+            Only jobid and queue are parsed here. Other fields are parsed
+            according to Cobalt.Job.fields when first accessed.
+            Missing or malformed fields get Cobalt.Job.defaults value.
+            """
+
+            raw = Cobalt.Job._split_fields(s)
+            queue = _parse_name(raw.get('queue'))
+            if 'jobid' not in raw or queue is None:
+                raise ValueError('Invalid job initializer: {}'.format(s))
+            job = Cobalt.Job.__new__(Cobalt.Job)
+            job._raw = raw
+            job.jobid = int(raw['jobid'])
+            job.queue = queue
+            return job
+
+        @staticmethod
+        def _split_fields(s):
+            """
+            Return the raw values of a `qstat -f -l` record by Job attribute.
+            """
+
+            raw = {}
+            for line in s.splitlines():
+                field, sep, value = line.partition(':')
+                if not sep:
+                    continue
+                field = Cobalt.Job.fields.get(field.strip())
+                if field is not None:
+                    raw[field[0]] = value.strip()
+            return raw
 
         def cancel(self):
             """
-            Stop and delete this job
+            Stop and delete this job.
+            Prefer Cobalt.cancel_many() to cancel several jobs.
+            Return the command line and its output.
             """
 
-            cmd = 'qdel {}'.format(self.jobid)
-            print(cmd)
-            print(getoutput(cmd))
+            return Cobalt.cancel_many([self])
 
         def hold(self):
             """
-            Put this job on hold
+            Put this job on hold.
+            Prefer Cobalt.hold_many() to hold several jobs.
+            Return the command line and its output.
             """
 
-            cmd = 'qhold {}'.format(self.jobid)
-            print(cmd)
-            print(getoutput(cmd))
+            return Cobalt.hold_many([self])
 
         def release(self):
             """
-            Release this job from hold state
+            Release this job from hold state.
+            Prefer Cobalt.release_many() to release several jobs.
+            Return the command line and its output.
             """
-            cmd = 'qrls {}'.format(self.jobid)
-            print(cmd)
-            print(getoutput(cmd))
+
+            return Cobalt.release_many([self])
 
     class Queue:
         """
@@ -320,27 +388,9 @@ class Cobalt:
         state: A queue state string: running, queued, exiting
         """
 
-        name_re = re.compile('.*Name:\s*(?P<name>[a-zA-Z0-9-_.]+)\s*?',
-                             re.DOTALL)
-        users_re = re.compile('.*Users\s*:\s*(?P<users>[a-zA-Z0-9-_.:]+).*',
-                              re.DOTALL)
-        groups_re = re.compile('.*Groups\s*:\s*(?P<groups>[a-zA-Z0-9-_.:]+).*',
-                               re.DOTALL)
-        mintime_re = re.compile('.*MinTime\s*:\s*(?P<mintime>\d+:\d+:\d+).*',
-                                re.DOTALL)
-        maxtime_re = re.compile('.*MaxTime\s*:\s*(?P<maxtime>\d+:\d+:\d+).*',
-                                re.DOTALL)
-        maxrunning_re = re.compile('.*MaxRunning\s*:\s*(?P<maxrunning>\d+).*',
-                                   re.DOTALL)
-        maxqueued_re = re.compile('.*MaxQueued\s*:\s*(?P<maxqueued>\d+).*',
-                                  re.DOTALL)
-        maxusernodes_re = re.compile(
-            '.*MaxUserNodes\s*:\s*(?P<maxusernodes>\d+).*', re.DOTALL)
-        maxnodehours_re = re.compile(
-            '.*MaxNodeHours\s*:\s*(?P<maxnodehours>\d+).*', re.DOTALL)
-        totalnodes_re = re.compile('.*TotalNodes\s*:\s*(?P<totalnodes>\d+).*',
-                                   re.DOTALL)
-        state_re = re.compile('.*State\s*:\s*(?P<state>\w+).*', re.DOTALL)
+        __slots__ = ('jobs', 'name', 'users', 'groups', 'mintime', 'maxtime',
+                     'maxrunning', 'maxqueued', 'maxusernodes', 'maxnodehours',
+                     'totalnodes', 'state', 'num_user_jobs')
 
         # When this information is not available from cobalt, we lookup this
         # table filled from jlse wiki when info is available or 0 if not.
@@ -478,91 +528,51 @@ class Cobalt:
             qstat_queue_output: A blob output from `qstat -Q -l` representing this queue.
             """
 
-            self.jobs = []
-            match = Cobalt.Queue.name_re.match(qstat_queue_output)
-            if match is None:
+            # `field : value` lines split without regex.
+            fields = {}
+            for line in qstat_queue_output.splitlines():
+                field, sep, value = line.partition(':')
+                if sep:
+                    fields[field.strip()] = value.strip()
 
+            # Queue jobs by jobid.
+            self.jobs = {}
+            # Number of current user jobs counted by Cobalt.get_queues_jobs().
+            # A snapshot: it is not updated when self.jobs is changed.
+            self.num_user_jobs = 0
+            self.name = _parse_name(fields.get('Name'))
+            if self.name is None:
                 raise ValueError(
                     'Invalid queue initializer: {}'.format(qstat_queue_output))
-            self.name = match.group(1)
-
-            match = Cobalt.Queue.users_re.match(qstat_queue_output)
-            if match is None:
-                self.users = []
-            else:
-                self.users = match.group(1).split(':')
-
-            match = Cobalt.Queue.groups_re.match(qstat_queue_output)
-            if match is None:
-                self.groups = []
-            else:
-                self.groups = match.group(1).split(':')
-
-            match = Cobalt.Queue.mintime_re.match(qstat_queue_output)
-            if match is None:
-                self.mintime = timedelta(minutes=10)  # At least 10 seconds
-            else:
-                hours, minutes, seconds = [
-                    int(i) for i in match.group(1).split(':')
-                ]
-                self.mintime = timedelta(hours=hours,
-                                         minutes=minutes,
-                                         seconds=sedonds)
-
-            match = Cobalt.Queue.maxtime_re.match(qstat_queue_output)
-            if match is None:
-                self.maxtime = timedelta(hours=1)
-            else:
-                hours, minutes, seconds = [
-                    int(i) for i in match.group(1).split(':')
-                ]
-                self.maxtime = timedelta(hours=hours,
-                                         minutes=minutes,
-                                         seconds=seconds)
-
-            match = Cobalt.Queue.maxrunning_re.match(qstat_queue_output)
-            if match is None:
-                self.maxrunning = 0
-            else:
-                self.maxrunning = int(match.group(1))
-
-            match = Cobalt.Queue.maxqueued_re.match(qstat_queue_output)
-            if match is None:
-                self.maxqueued = 0
-            else:
-                self.maxqueued = int(match.group(1))
+            defaults = Cobalt.Queue.defaults.get(self.name, {})
+            field = Cobalt.Queue._field
+            self.users = field(fields, 'Users', _parse_list, [])
+            self.groups = field(fields, 'Groups', _parse_list, [])
+            # At least 10 minutes
+            self.mintime = field(fields, 'MinTime', _parse_hms,
+                                 timedelta(minutes=10))
+            self.maxtime = field(fields, 'MaxTime', _parse_hms,
+                                 timedelta(hours=1))
+            self.maxrunning = field(fields, 'MaxRunning', _parse_int, 0)
+            self.maxqueued = field(fields, 'MaxQueued', _parse_int, 0)
+            self.maxusernodes = field(fields, 'MaxUserNodes', _parse_int,
+                                      defaults.get('maxusernodes', 0))
+            self.maxnodehours = field(fields, 'MaxNodeHours', _parse_int, 0)
+            self.totalnodes = field(fields, 'TotalNodes', _parse_int,
+                                    defaults.get('totalnodes', 0))
+            self.state = field(fields, 'State', _parse_name, 'unknown')
 
-            match = Cobalt.Queue.maxusernodes_re.match(qstat_queue_output)
-            if match is None:
-                try:
-                    self.maxusernodes = Cobalt.Queue.defaults[
-                        self.name]['maxusernodes']
-                except KeyError:
-                    self.maxusernodes = 0
-            else:
-                self.maxusernodes = int(match.group(1))
-
-            match = Cobalt.Queue.maxnodehours_re.match(qstat_queue_output)
-            if match is None:
-                self.maxnodehours = 0
-            else:
-                self.maxnodehours = int(match.group(1))
-
-            match = Cobalt.Queue.totalnodes_re.match(qstat_queue_output)
-            if match is None:
-                try:
-                    self.totalnodes = Cobalt.Queue.defaults[
-                        self.name]['totalnodes']
-                except KeyError:
-                    self.totalnodes = 0
-            else:
-                self.totalnodes = int(match.group(1))
+        @staticmethod
+        def _field(fields, name, parse, default):
+            """
+            Return parsed fields[name] or default if it is missing or malformed.
+            """
 
-            match = Cobalt.Queue.state_re.match(qstat_queue_output)
-            if match is None:
-                self.state = 'unknown'
-            else:
-                self.state = match.group(1)
+            try:
+                value = parse(fields[name])
+            except (KeyError, ValueError):
+                return default
+            return default if value is None else value
 
         def __eq__(self, other):
             if isinstance(other, Cobalt.Queue):
@@ -574,12 +584,23 @@ class Cobalt:
         def __repr__(self):
             return self.name
 
+        @property
+        def jobs_list(self):
+            """
+            List of queue jobs.
+            """
+            return list(self.jobs.values())
+
         def __str__(self):
+            queued = running = 0
+            for j in self.jobs.values():
+                if j.state == 'queued':
+                    queued += 1
+                elif j.state == 'running':
+                    running += 1
             s = self.name + ':\n'
-            s += '\tqueued: {}\n'.format(
-                len([j for j in self.jobs if j.state == 'queued']))
-            s += '\trunning: {}\n'.format(
-                len([j for j in self.jobs if j.state == 'running']))
+            s += '\tqueued: {}\n'.format(queued)
+            s += '\trunning: {}\n'.format(running)
             s += '\tusers: {}\n'.format(', '.join(self.users))
             s += '\tgroups: {}\n'.format(', '.join(self.groups))
             s += '\tmintime: {!s}\n'.format(self.mintime)
@@ -601,12 +622,12 @@ class Cobalt:
                    stderr=None,
                    stdout=None,
                    output_prefix=None,
-                   users=[getuser()],
+                   users=None,
                    project=None,
-                   attrs={},
-                   dependencies=[],
-                   geometry=[],
-                   env={},
+                   attrs=None,
+                   dependencies=None,
+                   geometry=None,
+                   env=None,
                    hold=False,
                    input_file=None,
                    email=None,
@@ -627,6 +648,7 @@ class Cobalt:
             output_prefix (str): Use  the  specified  prefix for both .output, .error and debuglog files.
             users ([str]): Sets a list of users for the job being submitted. All users in  this list will be able to execute 
             cobalt commands to control the job. The submitting user is always able to run commands on a submitted job.
+            Defaults to the current user.
             project (str): Associate  the  job  with the allocation for project project. This is used to properly account for machine usage.
             attrs ([str]): Set a list of attributes for a job that must be fulfilled for a job  to  run.
             dependencies ([int] or [Job]): Set  the  dependencies for the job being submitted.  This job won't run until all jobs in the dependency list 
@@ -645,7 +667,7 @@ class Cobalt:
 
             # Enforce user policy
             if hasattr(self, 'jobs'):
-                num_used = len([j for j in self.jobs if j.user == user])
+                num_used = sum(1 for j in self.jobs.values() if j.user == user)
                 if hasattr(self, 'maxusernodes'
                            ) and num_used + nodecount > self.maxusernodes:
                     raise StopIteration(
@@ -659,57 +681,62 @@ class Cobalt:
                         'Submition on {} cancelled because queue is busy.'.
                         format(self.name))
             time = time if time is not None else self.maxtime
+            users = users if users is not None else [user]
 
-            fd, filename = mkstemp(suffix='.sh')
-            file = os.fdopen(fd, 'w')
-            
-            file.write('#!/bin/bash\n\n')
-            file.write('#COBALT --user_list {}\n'.format(':'.join(users)))
+            lines = ['#!/bin/bash\n\n',
+                     '#COBALT --user_list {}\n'.format(':'.join(users))]
             if proccount > 1:
-                file.write('#COBALT --proccount {}\n'.format(proccount))
+                lines.append('#COBALT --proccount {}\n'.format(proccount))
             if cwd is not None:
-                file.write('#COBALT --cwd {}\n'.format(cwd))
+                lines.append('#COBALT --cwd {}\n'.format(cwd))
             if stderr is not None:
-                file.write('#COBALT --error {}\n'.format(stderr))
+                lines.append('#COBALT --error {}\n'.format(stderr))
             if stdout is not None:
-                file.write('#COBALT --output {}\n'.format(stdout))
+                lines.append('#COBALT --output {}\n'.format(stdout))
             if output_prefix is not None:
-                file.write('#COBALT --outputprefix {}\n'.format(output_prefix))
+                lines.append('#COBALT --outputprefix {}\n'.format(output_prefix))
             if project is not None:
-                file.write('#COBALT --run_project {}\n'.format(':'.join(project)))
-            if len(attrs) > 0:
-                file.write('#COBALT --attrs {}\n'.format(':'.join(
+                lines.append('#COBALT --run_project {}\n'.format(project))
+            if attrs:
+                lines.append('#COBALT --attrs {}\n'.format(':'.join(
                         ['{!s}={!s}'.format(k, v) for k, v in attrs.items()])))
-            if len(dependencies) > 0:
-                file.write('#COBALT --dependencies {}\n'.format(':'.join([
-                    d.jobid if isinstance(d, Cobalt.Job) else int(d)
-                    for d in dependencies ])))
-            if len(geometry) > 0:
-                file.write('#COBALT --geometry {}\n'.format('x'.join(geometry)))
-            if len(env) > 0:
-                file.write('#COBALT --env {}\n'.format(':'.join(['{!s}={!s}'.format(k, v) for k, v in env.items()])))
+            if dependencies:
+                dependencies = [ d.jobid if isinstance(d, Cobalt.Job) else int(d)
+                                 for d in dependencies ]
+                lines.append('#COBALT --dependencies {}\n'.format(
+                    ':'.join(str(d) for d in dependencies)))
+            if geometry:
+                lines.append('#COBALT --geometry {}\n'.format('x'.join(geometry)))
+            if env:
+                lines.append('#COBALT --env {}\n'.format(':'.join(['{!s}={!s}'.format(k, v) for k, v in env.items()])))
             if hold:
-                file.write('#COBALT --held\n')
+                lines.append('#COBALT --held\n')
             if input_file is not None:
-                file.write('#COBALT --input_file {}\n'.format(input_file))
+                lines.append('#COBALT --input_file {}\n'.format(input_file))
             if email is not None:
-                file.write('#COBALT --notify {}\n'.format(email))
+                lines.append('#COBALT --notify {}\n'.format(email))
             if umask is not None:
-                file.write('#COBALT --umask {}\n'.format(umask))
+                lines.append('#COBALT --umask {}\n'.format(umask))
 
-            file.write('\n')
+            lines.append('\n')
             if cwd is not None:
-                file.write('cd {}\n'.format(cwd))
-            file.write('{}\n'.format(cmd))
+                lines.append('cd {}\n'.format(cwd))
+            lines.append('{}\n'.format(cmd))
+
+            # The script is written at once and closed before qsub reads it.
+            fd, filename = mkstemp(suffix='.sh')
+            os.write(fd, ''.join(lines).encode())
+            os.close(fd)
             os.chmod(filename, stat.S_IRUSR | stat.S_IXUSR | stat.S_IROTH | stat.S_IXOTH)
 
 
-            command = 'qsub --queue {} -n {} -t {}'.format(self.name, nodecount, time)
+            argv = ['qsub', '--queue', self.name, '-n', str(nodecount),
+                    '-t', str(time)]
             if jobname is not None:
-                command += ' --jobname {}'.format(jobname)
-            command += ' ' + filename
-            jobid = int(getoutput(command))
-            del(file)
+                argv += ['--jobname', jobname]
+            argv.append(filename)
+            Cobalt.invalidate_cache()
+            jobid = int(getoutput(argv))
 
             self.maxusernodes -= 1
             return Cobalt.Job(jobid=jobid,
@@ -733,29 +760,174 @@ class Cobalt:
                               attrs=attrs,
                               notify=email)
 
+    @staticmethod
+    def _run_many(command, jobs):
+        """
+        Run a cobalt job command once with all the jobids of a list of jobs.
+        Return the command line followed by its output, or None if there
+        is no job.
+        """
+
+        if len(jobs) == 0:
+            return None
+        Cobalt.invalidate_cache()
+        argv = [command] + [ str(j.jobid) for j in jobs ]
+        return '{}\n{}'.format(' '.join(argv), getoutput(argv).rstrip('\n'))
+
+    @staticmethod
+    def cancel_many(jobs):
+        """
+        Stop and delete a list of jobs with a single qdel call.
+        Return the command line and its output.
+        """
+
+        return Cobalt._run_many('qdel', jobs)
+
+    @staticmethod
+    def hold_many(jobs):
+        """
+        Put a list of jobs on hold with a single qhold call.
+        Return the command line and its output.
+        """
+
+        return Cobalt._run_many('qhold', jobs)
+
+    @staticmethod
+    def release_many(jobs):
+        """
+        Release a list of jobs from hold state with a single qrls call.
+        Return the command line and its output.
+        """
+
+        return Cobalt._run_many('qrls', jobs)
+
+    @staticmethod
+    def invalidate_cache():
+        """
+        Forget cached queues and jobs such that next get_queues_jobs() call
+        queries cobalt.
+        """
+
+        Cobalt._cache = None
+        try:
+            os.remove(Cobalt.cache_file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _load_cache():
+        """
+        Return cached (queues, jobs) if cache is fresh, else None.
+        Result of this process last query is unpickled from memory without
+        reading cache_file.
+        """
+
+        if Cobalt._cache is not None:
+            t, data = Cobalt._cache
+            if time.monotonic() - t < Cobalt.cache_ttl:
+                return pickle.loads(data)
+            Cobalt._cache = None
+        # Checks are made on the opened file, and a symbolic link in the
+        # shared temporary directory is not followed.
+        try:
+            fd = os.open(Cobalt.cache_file,
+                         os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+        except OSError:
+            return None
+        with os.fdopen(fd, 'rb') as f:
+            st = os.fstat(fd)
+            # Only trust a regular file owned by us that nobody else can
+            # write.
+            if not stat.S_ISREG(st.st_mode) or st.st_uid != os.getuid() or \
+               st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                return None
+            if time.time() - st.st_mtime >= Cobalt.cache_ttl:
+                return None
+            try:
+                return pickle.load(f)
+            except Exception:
+                return None
+
+    @staticmethod
+    def _save_cache(queues, jobs):
+        """
+        Store (queues, jobs) in this process and in cache_file.
+        """
+
+        if Cobalt.cache_ttl <= 0:
+            return
+        data = pickle.dumps((queues, jobs), pickle.HIGHEST_PROTOCOL)
+        Cobalt._cache = (time.monotonic(), data)
+        try:
+            fd, filename = mkstemp(dir=os.path.dirname(Cobalt.cache_file),
+                                   suffix='.pkl')
+        except Exception:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(filename, Cobalt.cache_file)
+        except Exception:
+            # Do not leave a temporary file behind for each query.
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _parse_records(records, parse):
+        """
+        Parse each qstat record with parse().
+        Records rejected by parse() with a ValueError are skipped, such that
+        each record is scanned once.
+        """
+
+        for record in records:
+            try:
+                yield parse(record)
+            except ValueError:
+                pass
+
     @staticmethod
     def get_queues_jobs():
         """
         Return a list of available queues and a list of available jobs.
         (2 values to unpack)
+        Result is reused for Cobalt.cache_ttl seconds across calls and
+        processes. See Cobalt.invalidate_cache().
         """
 
-        queues = [
-            Cobalt.Queue(l) for l in str(getoutput('qstat -Q -l')).split('\n\n')
-            if Cobalt.Queue.name_re.match(l)
-        ]
-        jobs = [
-            Cobalt.Job.from_string(l) for l in str(getoutput('qstat -f -l')).split('\n\n')
-            if Cobalt.Job.jobid_re.match(l)
-        ]
+        if Cobalt.cache_ttl > 0:
+            cached = Cobalt._load_cache()
+            if cached is not None:
+                return cached
+
+        # Both qstat are started before reading any of them, so that their
+        # server round-trips overlap. Records are parsed as qstat prints them.
+        # If one of them fails, the other is killed and waited.
+        queue_records = _qstat(['-Q', '-l'])
+        try:
+            job_records = _qstat(['-f', '-l'])
+            try:
+                queues = list(Cobalt._parse_records(queue_records,
+                                                    Cobalt.Queue))
+                jobs = list(Cobalt._parse_records(job_records,
+                                                  Cobalt.Job.from_string))
+            finally:
+                job_records.close()
+        finally:
+            queue_records.close()
         # Connect jobs and queues.
+        queue_by_name = { q.name: q for q in queues }
         for j in jobs:
-            q = next((q for q in queues if q.name == j.queue), None)
+            q = queue_by_name.get(j.queue)
             if q is not None:
                 j.queue = q
-                q.jobs.append(j)
+                q.jobs[j.jobid] = j
                 if j.user == user:
+                    q.num_user_jobs += 1
                     q.maxusernodes -= 1
+        Cobalt._save_cache(queues, jobs)
         return queues, jobs
 
     @staticmethod
@@ -779,10 +951,33 @@ class Cobalt:
     @staticmethod
     def get_myjobs():
         """
-        Get a list of current user jobs
+        Get a list of current user jobs.
+        Unless cached jobs are still valid, only current user jobs are
+        queried and parsed. Either way, job queue is the queue name and not
+        a Cobalt.Queue.
+        """
+
+        if Cobalt.cache_ttl > 0:
+            cached = Cobalt._load_cache()
+            if cached is not None:
+                jobs = [j for j in cached[1] if j.user == user]
+                for j in jobs:
+                    j.queue = getattr(j.queue, 'name', j.queue)
+                return jobs
+        return Cobalt._fetch_jobs(user=user)
+
+    @staticmethod
+    def _fetch_jobs(user=None):
+        """
+        Query and parse jobs without connecting them to their queue.
+        user (str): Only query this user jobs. Defaults to all jobs.
         """
 
-        return [j for j in Cobalt.get_jobs() if j.user == user]
+        args = ['-f', '-l']
+        if user is not None:
+            args = ['-u', user] + args
+        return list(Cobalt._parse_records(_qstat(args),
+                                          Cobalt.Job.from_string))
 
 
 class UserPolicy():
@@ -814,9 +1009,34 @@ class UserPolicy():
         self.office_maxtime = office_maxtime
         self.maxtime = maxtime
 
-    def get_queues(self):
+    def __setattr__(self, name, value):
+        # _policy_cache maps (weekday, minute of the day) to
+        # (occupancy, maxtime). Setting any attribute drops it, so that
+        # policies are computed again from current attribute values.
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_policy_cache', {})
+
+    def _compute_policy(self, weekday, minute):
+        """
+        Return (occupancy, maxtime) applying at this weekday and minute of
+        the day, occupancy being a (numerator, denominator) pair.
+        Office hours bounds are checked at the start of the minute.
+        """
+
+        sec = minute * 60
+        if weekday < 5 or sec < self.office_day_start.total_seconds() or \
+           sec > self.office_day_stop.total_seconds():
+            occupancy, maxtime = self.office_max_occupancy, self.office_maxtime
+        else:
+            occupancy, maxtime = self.max_occupancy, self.maxtime
+        # Rounding to millionths keeps the decimal value given (0.2 and not
+        # the binary float slightly above it).
+        return (round(occupancy * 10**6), 10**6), maxtime
+
+    def get_queues(self, queues=None):
         """
         Get available submissions queues according to this user policy.
+        queues: The list of queues to filter. If None, queues are queried with Cobalt.get_queues().
         According to the current time (office hours or not) we compute the amount
         of available nodes we are allowed to us. The amount of allowed nodes for submission
         is overwritten in queue attribute 'maxusernodes'.
@@ -825,25 +1045,30 @@ class UserPolicy():
         q.maxtime is set to policy time such that q.submit() will use the policy time if it is not manually set.
         """
 
-        queues = Cobalt.get_queues()
-        max_occupancy = self.max_occupancy
-        maxtime = self.maxtime
+        if queues is None:
+            queues = Cobalt.get_queues()
         now = datetime.now()
-        dt = timedelta(hours=now.hour, minutes=now.minute, seconds=now.second)
-
-        if now.weekday(
-        ) < 5 or dt < self.office_day_start or dt > self.office_day_stop:
-            max_occupancy = self.office_max_occupancy
-            maxtime = self.office_maxtime
+        key = (now.weekday(), now.hour * 60 + now.minute)
+        policy = self._policy_cache.get(key)
+        if policy is None:
+            policy = self._compute_policy(*key)
+            self._policy_cache[key] = policy
+        (occ_num, occ_den), maxtime = policy
 
+        available = []
         for q in queues:
-            num_used = len([j for j in q.jobs if j.user == user])
-            maxusernodes = max(1, ceil(q.totalnodes * max_occupancy))
+            num_used = q.num_user_jobs
+            # Integer ceiling of q.totalnodes * occupancy.
+            maxusernodes = max(1, -(-q.totalnodes * occ_num // occ_den))
             q.maxusernodes = max(1 if num_used == 0 else 0,
                                  maxusernodes - num_used)
-            q.maxtime = min(maxtime, q.maxtime)
-        queues = [q for q in queues if q.maxusernodes > 0]
-        return queues
+            # Dropped queue: its maxtime is not relevant.
+            if q.maxusernodes <= 0:
+                continue
+            if q.maxtime > maxtime:
+                q.maxtime = maxtime
+            available.append(q)
+        return available
 
 
 __all__ = ['Cobalt', 'UserPolicy']
@@ -15,6 +15,6 @@ setup(name='cobalt',
       author_email='ndenoyelle@anl.gov',
       license='BSD-3-Clause',
       packages=['cobalt'],
-      python_requires='>=2.7',
+      python_requires='>=3.7',
       zip_safe=False)
 